@@ -1,13 +1,72 @@
+import asyncio
+import functools
+import inspect
 import logging
-from typing import Any, List, Optional
+import time
+from typing import Any, Awaitable, Callable, List, Optional, TypeVar, Union
 
 import httpx
+import orjson
 from config import (
     API_BASE_URL,
     API_BOT_NODE_URL,
     API_BOT_ROOT_URL,
     API_MESSAGES_URL,
 )
+from keyboard_utils import invalidate_keyboard
+
+ROOT_NODE_CACHE_KEY = "root"
+ROOT_NODE_CACHE_TTL = 10.0
+CONTENT_NODE_CACHE_TTL = 30.0
+
+T = TypeVar("T")
+
+
+def _api_call(
+    label: str,
+) -> Callable[
+    [Callable[..., Awaitable[T]]], Callable[..., Awaitable[Optional[T]]],
+]:
+    """Оборачивает метод ApiClient в общую обработку ошибок httpx.
+
+    При ошибке HTTP-статуса или запроса логирует её и возвращает None.
+
+    Args:
+        label (str): Описание операции для лога; может содержать
+            подстановки аргументов метода, например ``{node_id}``.
+
+    Returns:
+        Callable: Декоратор метода.
+
+    """
+    def decorator(
+        method: Callable[..., Awaitable[T]],
+    ) -> Callable[..., Awaitable[Optional[T]]]:
+        signature = inspect.signature(method)
+
+        def describe(args: tuple, kwargs: dict) -> str:
+            bound = signature.bind(*args, **kwargs)
+            return label.format(**bound.arguments)
+
+        @functools.wraps(method)
+        async def wrapper(*args: Any, **kwargs: Any) -> Optional[T]:
+            try:
+                return await method(*args, **kwargs)
+            except httpx.HTTPStatusError as e:
+                logging.error(
+                    f"HTTP ошибка при {describe(args, kwargs)}: {e}, "
+                    f"ответ: {e.response.text}",
+                )
+                return None
+            except httpx.RequestError as e:
+                logging.error(
+                    f"Ошибка запроса при {describe(args, kwargs)}: {e}",
+                )
+                return None
+
+        return wrapper
+
+    return decorator
 
 
 class ApiClient:
@@ -21,9 +80,155 @@ class ApiClient:
 
         """
         self.base_url = base_url
-        self.session = httpx.AsyncClient(base_url=base_url)
+        self.session = httpx.AsyncClient(
+            base_url=base_url,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=30.0,
+            ),
+            timeout=httpx.Timeout(10.0, connect=3.0),
+        )
         self.token = None
+        self._node_cache: dict[
+            Union[int, str], tuple[float, dict[str, Any]]
+        ] = {}
+        self._node_requests: dict[Union[int, str], asyncio.Task] = {}
+        self._tickets_cache: dict[int, list[dict[str, Any]]] = {}
+
+    def _get_cached_node(
+        self, key: Union[int, str], ttl: float,
+    ) -> Optional[dict[str, Any]]:
+        """Возвращает узел из кэша, если запись ещё не устарела.
 
+        Args:
+            key (Union[int, str]): ID узла или ключ корневого узла.
+            ttl (float): Время жизни записи в секундах.
+
+        Returns:
+            Optional[dict[str, Any]]: Данные узла или None.
+
+        """
+        entry = self._node_cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+        return None
+
+    def is_node_fresh(self, node_id: Union[int, str]) -> bool:
+        """Проверяет, есть ли в кэше неустаревшая копия узла.
+
+        Args:
+            node_id (Union[int, str]): ID узла или ключ корневого узла.
+
+        Returns:
+            bool: True, если узел можно получить без запроса к API.
+
+        """
+        ttl = (
+            ROOT_NODE_CACHE_TTL
+            if node_id == ROOT_NODE_CACHE_KEY
+            else CONTENT_NODE_CACHE_TTL
+        )
+        return self._get_cached_node(node_id, ttl) is not None
+
+    def _get_stale_node(
+        self, key: Union[int, str],
+    ) -> Optional[dict[str, Any]]:
+        """Возвращает последнюю успешно полученную версию узла.
+
+        Записи кэша не удаляются по истечении TTL, поэтому они служат
+        резервной копией на случай недоступности API.
+
+        Args:
+            key (Union[int, str]): ID узла или ключ корневого узла.
+
+        Returns:
+            Optional[dict[str, Any]]: Данные узла или None.
+
+        """
+        entry = self._node_cache.get(key)
+        return entry[1] if entry is not None else None
+
+    def invalidate_node(
+        self, node_id: Optional[Union[int, str]] = None,
+    ) -> None:
+        """Сбрасывает закэшированные данные и клавиатуру узла контента.
+
+        Args:
+            node_id (Optional[Union[int, str]]): ID узла; если не указан,
+                очищается весь кэш узлов.
+
+        """
+        if node_id is None:
+            self._node_cache.clear()
+            invalidate_keyboard()
+            return
+        entry = self._node_cache.pop(node_id, None)
+        if node_id != ROOT_NODE_CACHE_KEY:
+            invalidate_keyboard(node_id)
+        elif entry is not None:
+            invalidate_keyboard(entry[1]["id"])
+
+    async def _get_json(self, url: str) -> Any:
+        """Выполняет GET-запрос и декодирует JSON-ответ через orjson.
+
+        Args:
+            url (str): Относительный URL эндпоинта.
+
+        Returns:
+            Any: Декодированное тело ответа.
+
+        """
+        response = await self.session.get(url)
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
+    async def _fetch_node(self, key: Union[int, str], url: str) -> Any:
+        """Загружает узел и сохраняет его в кэш, объединяя запросы.
+
+        Если запрос этого узла уже выполняется, ожидает его результат
+        вместо отправки повторного запроса.
+
+        Args:
+            key (Union[int, str]): ID узла или ключ корневого узла.
+            url (str): Относительный URL узла.
+
+        Returns:
+            Any: Данные узла.
+
+        """
+        request = self._node_requests.get(key)
+        if request is None:
+            request = asyncio.create_task(self._get_json(url))
+            self._node_requests[key] = request
+            request.add_done_callback(
+                lambda _: self._node_requests.pop(key, None),
+            )
+        data = await asyncio.shield(request)
+        self._node_cache[key] = (time.monotonic(), data)
+        return data
+
+    async def _post_json(self, url: str, payload: dict[str, Any]) -> Any:
+        """Выполняет POST-запрос с JSON-телом, закодированным через orjson.
+
+        Args:
+            url (str): Относительный URL эндпоинта.
+            payload (dict[str, Any]): Данные для отправки.
+
+        Returns:
+            Any: Декодированное тело ответа.
+
+        """
+        response = await self.session.post(
+            url,
+            content=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
+    @_api_call("логине для {username}")
     async def login(
         self, username: str, password: str, telegram_id: int,
     ) -> Optional[dict[str, Any]]:
@@ -38,106 +243,150 @@ class ApiClient:
             Optional[dict[str, Any]]: Токен и данные пользователя.
 
         """
-        try:
-            login_data = {
-                "username": username,
-                "password": password,
-                "telegram_id": telegram_id,
-            }
-            response = await self.session.post("/auth/login", json=login_data)
-            response.raise_for_status()
-            data = response.json()
-            self.token = data["token"]
-            self.session.headers.update(
-                {"Authorization": f"Bearer {self.token}"},
-            )
-            return data
-        except httpx.HTTPStatusError as e:
-            logging.error(
-                f"HTTP ошибка при логине для {username}: {e}, "
-                f"ответ: {e.response.text}",
-            )
-            return None
-        except httpx.RequestError as e:
-            logging.error(f"Ошибка запроса при логине для {username}: {e}")
-            return None
+        login_data = {
+            "username": username,
+            "password": password,
+            "telegram_id": telegram_id,
+        }
+        data = await self._post_json("/auth/login", login_data)
+        self.token = data["token"]
+        self.session.headers.update(
+            {"Authorization": f"Bearer {self.token}"},
+        )
+        return data
 
-    async def get_root_node(self) -> Optional[dict[str, Any]]:
-        """Получает данные корневого узла контента."""
+    @_api_call("получении корневого узла")
+    async def get_root_node(
+        self, allow_stale: bool = True,
+    ) -> Optional[dict[str, Any]]:
+        """Получает данные корневого узла контента.
+
+        Args:
+            allow_stale (bool): Вернуть устаревшую копию из кэша,
+                если API недоступен.
+
+        Returns:
+            Optional[dict[str, Any]]: Данные корневого узла.
+
+        """
+        cached = self._get_cached_node(
+            ROOT_NODE_CACHE_KEY, ROOT_NODE_CACHE_TTL,
+        )
+        if cached is not None:
+            return cached
         try:
-            response = await self.session.get(API_BOT_ROOT_URL)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            logging.error(f"HTTP ошибка при получении корневого узла: {e}")
-            return None
+            data = await self._fetch_node(
+                ROOT_NODE_CACHE_KEY, API_BOT_ROOT_URL,
+            )
         except httpx.RequestError as e:
-            logging.error(f"Ошибка запроса при получении корневого узла: {e}")
-            return None
+            stale = (
+                self._get_stale_node(ROOT_NODE_CACHE_KEY)
+                if allow_stale else None
+            )
+            if stale is None:
+                raise
+            logging.warning(
+                f"Ошибка запроса при получении корневого узла: {e}; "
+                "используется устаревшая копия",
+            )
+            return stale
+        return data
 
-    async def get_content_node(self, node_id: int) -> Optional[dict[str, Any]]:
+    @_api_call("получении узла контента {node_id}")
+    async def get_content_node(
+        self, node_id: int, allow_stale: bool = True,
+    ) -> Optional[dict[str, Any]]:
         """Получает данные узла контента по его ID.
 
         Args:
             node_id (int): Идентификатор узла.
+            allow_stale (bool): Вернуть устаревшую копию из кэша,
+                если API недоступен.
 
         Returns:
             Optional[dict[str, Any]]: Данные узла.
 
         """
+        cached = self._get_cached_node(node_id, CONTENT_NODE_CACHE_TTL)
+        if cached is not None:
+            return cached
         try:
-            response = await self.session.get(f"{API_BOT_NODE_URL}/{node_id}")
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            logging.error(
-                f"HTTP ошибка при получении узла контента {node_id}: {e}",
+            data = await self._fetch_node(
+                node_id, f"{API_BOT_NODE_URL}/{node_id}",
             )
-            return None
         except httpx.RequestError as e:
-            logging.error(
-                f"Ошибка запроса при получении узла контента {node_id}: {e}",
+            stale = self._get_stale_node(node_id) if allow_stale else None
+            if stale is None:
+                raise
+            logging.warning(
+                f"Ошибка запроса при получении узла контента {node_id}: {e}; "
+                "используется устаревшая копия",
             )
-            return None
+            return stale
+        return data
 
-    async def get_user_tickets(self) -> Optional[List[dict[str, Any]]]:
-        """Получает список бесед (тикетов) текущего пользователя."""
-        try:
-            response = await self.session.get(API_MESSAGES_URL)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            logging.error(f"HTTP ошибка при получении списка бесед: {e}")
-            return None
-        except httpx.RequestError as e:
-            logging.error(f"Ошибка запроса при получении списка бесед: {e}")
-            return None
+    def get_cached_user_tickets(
+        self, user_id: int,
+    ) -> Optional[List[dict[str, Any]]]:
+        """Возвращает последний полученный список бесед пользователя.
 
+        Args:
+            user_id (int): Telegram ID пользователя.
+
+        Returns:
+            Optional[List[dict[str, Any]]]: Список бесед или None,
+                если он ещё не запрашивался.
+
+        """
+        return self._tickets_cache.get(user_id)
+
+    @_api_call("получении списка бесед")
+    async def get_user_tickets(
+        self, user_id: Optional[int] = None,
+    ) -> Optional[List[dict[str, Any]]]:
+        """Получает список бесед (тикетов) текущего пользователя.
+
+        Args:
+            user_id (Optional[int]): Telegram ID пользователя; если указан,
+                список сохраняется в локальный кэш бесед.
+
+        Returns:
+            Optional[List[dict[str, Any]]]: Список бесед.
+
+        """
+        tickets = await self._get_json(API_MESSAGES_URL)
+        if user_id is not None:
+            self._tickets_cache[user_id] = tickets
+        return tickets
+
+    @_api_call("создании тикета")
     async def create_ticket(
-        self, ticket_data: dict[str, Any],
+        self, ticket_data: dict[str, Any], user_id: Optional[int] = None,
     ) -> Optional[dict[str, Any]]:
         """Создаёт новую беседу (тикет).
 
         Args:
             ticket_data (dict[str, Any]): Данные тикета.
+            user_id (Optional[int]): Telegram ID пользователя; если указан,
+                созданная беседа добавляется в его кэш бесед.
 
         Returns:
             Optional[dict[str, Any]]: Данные созданного тикета.
 
         """
-        try:
-            response = await self.session.post(
-                API_MESSAGES_URL, json=ticket_data,
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            logging.error(f"HTTP ошибка при создании тикета: {e}")
-            return None
-        except httpx.RequestError as e:
-            logging.error(f"Ошибка запроса при создании тикета: {e}")
-            return None
+        data = await self._post_json(API_MESSAGES_URL, ticket_data)
+        tickets = (
+            self._tickets_cache.get(user_id) if user_id is not None else None
+        )
+        if tickets is not None and "ticket_id" in data:
+            tickets.append({
+                **ticket_data,
+                **data,
+                "id": data.get("id", data["ticket_id"]),
+            })
+        return data
 
+    @_api_call("получении сообщений тикета {ticket_id}")
     async def get_ticket_messages(
         self, ticket_id: int,
     ) -> Optional[List[dict[str, Any]]]:
@@ -150,24 +399,9 @@ class ApiClient:
             Optional[List[dict[str, Any]]]: Список сообщений.
 
         """
-        try:
-            response = await self.session.get(
-                f"{API_MESSAGES_URL}/{ticket_id}/messages",
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            logging.error(
-                f"HTTP ошибка при получении сообщений тикета {ticket_id}: {e}",
-            )
-            return None
-        except httpx.RequestError as e:
-            logging.error(
-                f"Ошибка запроса при получении сообщений тикета "
-                f"{ticket_id}: {e}",
-            )
-            return None
+        return await self._get_json(f"{API_MESSAGES_URL}/{ticket_id}/messages")
 
+    @_api_call("отправке сообщения в беседу {ticket_id}")
     async def send_message_to_conversation(
         self, ticket_id: int, message_data: dict[str, Any],
     ) -> Optional[dict[str, Any]]:
@@ -181,24 +415,10 @@ class ApiClient:
             Optional[dict[str, Any]]: Ответ от API.
 
         """
-        try:
-            response = await self.session.post(
-                f"{API_MESSAGES_URL}/{ticket_id}/messages", json=message_data,
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            logging.error(
-                f"Ошибка при отправке сообщения в беседу {ticket_id}: {e}",
-            )
-            return None
-        except httpx.RequestError as e:
-            logging.error(
-                f"Ошибка запроса при отправке сообщения в беседу "
-                f"{ticket_id}: {e}",
-            )
-            return None
+        return await self._post_json(
+            f"{API_MESSAGES_URL}/{ticket_id}/messages", message_data,
+        )
 
     async def close(self) -> None:
-        """Закрывает асинхронную HTTP-сессию."""
+        """Закрывает асинхронную HTTP-сессию и пул соединений."""
         await self.session.aclose()
@@ -1,4 +1,19 @@
+from typing import Any
+
+import orjson
 from aiogram import Bot
+from aiogram.utils import json as aiogram_json
 from config import API_TOKEN
 
+
+def _orjson_dumps(data: Any) -> str:
+    """Сериализует данные в JSON-строку через orjson."""
+    return orjson.dumps(data).decode()
+
+
+# aiogram 2 обращается к aiogram.utils.json.dumps/loads при каждом запросе,
+# поэтому подмена функций модуля переводит на orjson все вызовы Bot API.
+aiogram_json.dumps = _orjson_dumps
+aiogram_json.loads = orjson.loads
+
 bot = Bot(token=API_TOKEN)
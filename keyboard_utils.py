@@ -1,20 +1,59 @@
+import functools
 import unicodedata
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 
+SUPPORT_BUTTON_TEXT = "✉ Написать в поддержку"
+NEW_CONVERSATION_BUTTON_TEXT = "➕ Новая беседа"
+LIST_CONVERSATIONS_BUTTON_TEXT = "📂 Мои беседы"
+BACK_BUTTON_TEXT = "⬅️ Назад"
+HOME_BUTTON_TEXT = "🏠 В начало"
+
 normalized_button_actions: Dict[str, Any] = {}
+_keyboard_cache: Dict[
+    Tuple[int, bool],
+    Tuple[Dict[str, Any], ReplyKeyboardMarkup, Dict[str, Any]],
+] = {}
 
 
-def normalize_text(text: str) -> str:
+def normalize_input_text(text: str) -> str:
     """Нормализует текстовую строку для сравнения.
 
-    Удаляет пробелы и приводит к нижнему регистру.
+    Удаляет пробелы и приводит к нижнему регистру. Для ASCII-строк
+    NFKC-нормализация не выполняется, так как ничего не меняет.
+    Результат не кэшируется, поэтому функция подходит для произвольного
+    пользовательского ввода.
 
     :param text: Входная строка.
     :return: Нормализованная строка.
     """
-    return unicodedata.normalize("NFKC", text.strip().lower())
+    normalized = text.strip().lower()
+    if normalized.isascii():
+        return normalized
+    return unicodedata.normalize("NFKC", normalized)
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_text(text: str) -> str:
+    """Нормализует текст кнопки с кэшированием результата.
+
+    Предназначена только для подписей кнопок; пользовательский ввод
+    нормализуется через normalize_input_text, чтобы не хранить его в кэше.
+
+    :param text: Подпись кнопки.
+    :return: Нормализованная строка.
+    """
+    return normalize_input_text(text)
+
+
+normalized_button_actions.update({
+    normalize_text(SUPPORT_BUTTON_TEXT): "support_menu",
+    normalize_text(NEW_CONVERSATION_BUTTON_TEXT): "new_conversation",
+    normalize_text(LIST_CONVERSATIONS_BUTTON_TEXT): "list_conversations",
+    normalize_text(BACK_BUTTON_TEXT): "back",
+    normalize_text(HOME_BUTTON_TEXT): "home",
+})
 
 
 def make_keyboard(
@@ -29,43 +68,51 @@ def make_keyboard(
     :param is_root: Флаг, указывающий, является ли текущий узел корневым.
     :return: Объект ReplyKeyboardMarkup.
     """
-    markup = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=False)
-    current_row_buttons = []
-    children_buttons = current_node_data.get('buttons', [])
-
-    for i, button_data in enumerate(children_buttons):
-        text = button_data.get('text', 'Неизвестно')
-        node_id_for_button = button_data.get('next_node_id')
-        if node_id_for_button is not None:
-            button = KeyboardButton(text)
-            current_row_buttons.append(button)
-            normalized_button_actions[
-                normalize_text(text)
-            ] = node_id_for_button
-            if len(current_row_buttons) == 2 or i == len(children_buttons) - 1:
-                markup.add(*current_row_buttons)
-                current_row_buttons = []
-
-    support_button_text = "✉ Написать в поддержку"
-    normalized_button_actions[
-        normalize_text(support_button_text)
-    ] = "support_menu"
-    markup.add(KeyboardButton(support_button_text))
+    cache_key = (current_node_id, is_root)
+    cached = _keyboard_cache.get(cache_key)
+    if cached is not None and cached[0] is current_node_data:
+        normalized_button_actions.update(cached[2])
+        return cached[1]
+
+    children_buttons = [
+        (button_data.get('text', 'Неизвестно'), button_data['next_node_id'])
+        for button_data in current_node_data.get('buttons', [])
+        if button_data.get('next_node_id') is not None
+    ]
+    node_actions: Dict[str, Any] = {
+        normalize_text(text): next_node_id
+        for text, next_node_id in children_buttons
+    }
+    markup = ReplyKeyboardMarkup(
+        resize_keyboard=True, one_time_keyboard=False, row_width=2,
+    )
+    markup.add(*(KeyboardButton(text) for text, _ in children_buttons))
+
+    markup.add(KeyboardButton(SUPPORT_BUTTON_TEXT))
 
     if not is_root:
-        back_button_text = "⬅️ Назад"
-        home_button_text = "🏠 В начало"
-        normalized_button_actions[normalize_text(back_button_text)] = "back"
-        normalized_button_actions[normalize_text(home_button_text)] = "home"
-        navigation_buttons = [
-            KeyboardButton(back_button_text),
-            KeyboardButton(home_button_text),
-        ]
-        markup.add(*navigation_buttons)
+        markup.add(
+            KeyboardButton(BACK_BUTTON_TEXT),
+            KeyboardButton(HOME_BUTTON_TEXT),
+        )
 
+    normalized_button_actions.update(node_actions)
+    _keyboard_cache[cache_key] = (current_node_data, markup, node_actions)
     return markup
 
 
+def invalidate_keyboard(node_id: Optional[int] = None) -> None:
+    """Удаляет закэшированные клавиатуры узла контента.
+
+    :param node_id: ID узла; если не указан, очищается весь кэш клавиатур.
+    """
+    if node_id is None:
+        _keyboard_cache.clear()
+        return
+    _keyboard_cache.pop((node_id, True), None)
+    _keyboard_cache.pop((node_id, False), None)
+
+
 def build_ticket_chat_keyboard() -> ReplyKeyboardMarkup:
     """Создает клавиатуру для чата с тикетами.
 
@@ -74,14 +121,10 @@ def build_ticket_chat_keyboard() -> ReplyKeyboardMarkup:
     :return: Объект ReplyKeyboardMarkup.
     """
     markup = ReplyKeyboardMarkup(resize_keyboard=True)
-    back_button_text = "⬅️ Назад"
-    home_button_text = "🏠 В начало"
     markup.add(
-        KeyboardButton(back_button_text),
-        KeyboardButton(home_button_text),
+        KeyboardButton(BACK_BUTTON_TEXT),
+        KeyboardButton(HOME_BUTTON_TEXT),
     )
-    normalized_button_actions[normalize_text(back_button_text)] = "back"
-    normalized_button_actions[normalize_text(home_button_text)] = "home"
     return markup
 
 
@@ -91,22 +134,12 @@ def build_support_menu_keyboard() -> ReplyKeyboardMarkup:
     :return: Объект ReplyKeyboardMarkup.
     """
     markup = ReplyKeyboardMarkup(resize_keyboard=True)
-    new_conv = "➕ Новая беседа"
-    my_conv = "📂 Мои беседы"
-    back_button_text = "⬅️ Назад"
-    home_button_text = "🏠 В начало"
-
-    markup.add(KeyboardButton(new_conv))
-    markup.add(KeyboardButton(my_conv))
+    markup.add(KeyboardButton(NEW_CONVERSATION_BUTTON_TEXT))
+    markup.add(KeyboardButton(LIST_CONVERSATIONS_BUTTON_TEXT))
     markup.add(
-        KeyboardButton(back_button_text),
-        KeyboardButton(home_button_text),
+        KeyboardButton(BACK_BUTTON_TEXT),
+        KeyboardButton(HOME_BUTTON_TEXT),
     )
-
-    normalized_button_actions[normalize_text(new_conv)] = "new_conversation"
-    normalized_button_actions[normalize_text(my_conv)] = "list_conversations"
-    normalized_button_actions[normalize_text(back_button_text)] = "back"
-    normalized_button_actions[normalize_text(home_button_text)] = "home"
     return markup
 
 
@@ -129,12 +162,8 @@ def build_user_tickets_keyboard(
             normalize_text(button_text)
         ] = f"ticket:{t['id']}"
 
-    back_button_text = "⬅️ Назад"
-    home_button_text = "🏠 В начало"
     markup.add(
-        KeyboardButton(back_button_text),
-        KeyboardButton(home_button_text),
+        KeyboardButton(BACK_BUTTON_TEXT),
+        KeyboardButton(HOME_BUTTON_TEXT),
     )
-    normalized_button_actions[normalize_text(back_button_text)] = "back"
-    normalized_button_actions[normalize_text(home_button_text)] = "home"
     return markup
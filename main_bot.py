@@ -1,14 +1,17 @@
 import logging
+import sys
 
 from aiogram import Dispatcher, types
 from aiogram.utils import executor
 from bot_instance import bot
-from state import (
-    api,
-    awaiting_username,
-)
+from state import api, users
 from text_handlers import text_message_handler
 
+if sys.platform != "win32":
+    import uvloop
+
+    uvloop.install()
+
 dp = Dispatcher(bot)
 logging.basicConfig(level=logging.INFO)
 
@@ -27,7 +30,7 @@ async def start_handler(message: types.Message) -> None:
 
     """
     user_id = message.from_user.id
-    awaiting_username[user_id] = True
+    users[user_id].awaiting = "username"
     await bot.send_message(user_id, "Введите ваше имя пользователя:")
 
 
@@ -1,7 +1,10 @@
+import asyncio
 import logging
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, Set
 
 from aiogram import types
+from aiogram.utils.exceptions import RetryAfter
+from api_client import ROOT_NODE_CACHE_KEY
 from bot_instance import bot
 from keyboard_utils import (
     build_support_menu_keyboard,
@@ -9,19 +12,171 @@ from keyboard_utils import (
     build_user_tickets_keyboard,
     make_keyboard,
 )
-from state import (
-    api,
-    creating_conversation,
-    user_nav_stack,
-    user_ticket_id,
-    waiting_for_message,
-)
+from state import api, users
+
+MESSAGE_CHUNK_LIMIT = 4000
+MEDIA_GROUP_LIMIT = 10
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def chunk_message_lines(
+    lines: List[str],
+    limit: int = MESSAGE_CHUNK_LIMIT,
+    separator: str = "\n\n",
+) -> List[str]:
+    """Склеивает строки в сообщения, не превышающие лимит Telegram.
+
+    Args:
+        lines: Список отформатированных строк.
+        limit: Максимальная длина одного сообщения.
+        separator: Разделитель между строками.
+
+    Returns:
+        Список текстов сообщений.
+
+    """
+    chunks: List[str] = []
+    current = ""
+    for line in lines:
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        if not current:
+            current = line
+        elif len(current) + len(separator) + len(line) <= limit:
+            current += separator + line
+        else:
+            chunks.append(current)
+            current = line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def send_photos(user_id: int, images: List[str]) -> None:
+    """Последовательно отправляет изображения отдельными сообщениями.
+
+    Отправка по одному сохраняет порядок изображений в чате и не создаёт
+    всплесков запросов к одному чату. Ошибки отправки отдельных
+    изображений логируются и не прерывают отправку остальных.
+
+    Args:
+        user_id: Идентификатор пользователя в Telegram.
+        images: Список URL изображений.
+
+    Returns:
+        None
+
+    Raises:
+        RetryAfter: Если Telegram ограничил частоту запросов.
+
+    """
+    for img_url in images:
+        try:
+            await bot.send_photo(user_id, img_url)
+        except RetryAfter:
+            raise
+        except Exception as e:
+            logging.error(
+                f"Не удалось отправить фото {img_url} "
+                f"пользователю {user_id}: {e}",
+            )
+
+
+async def send_node_images(user_id: int, images: List[str]) -> None:
+    """Отправляет изображения узла контента альбомами.
+
+    Изображения группируются по MEDIA_GROUP_LIMIT в один вызов
+    send_media_group. Одиночное изображение отправляется через send_photo.
+    Если альбом не удалось отправить, его изображения отправляются
+    по отдельности в исходном порядке, чтобы ошибка в одном URL
+    не скрывала остальные. При превышении лимита запросов оставшиеся
+    изображения пропускаются, чтобы не задерживать отправку меню.
+
+    Args:
+        user_id: Идентификатор пользователя в Telegram.
+        images: Список URL изображений.
+
+    Returns:
+        None
+
+    """
+    try:
+        for start in range(0, len(images), MEDIA_GROUP_LIMIT):
+            batch = images[start:start + MEDIA_GROUP_LIMIT]
+            if len(batch) == 1:
+                await send_photos(user_id, batch)
+                continue
+            try:
+                await bot.send_media_group(
+                    user_id,
+                    [types.InputMediaPhoto(img_url) for img_url in batch],
+                )
+            except RetryAfter:
+                raise
+            except Exception as e:
+                logging.warning(
+                    f"Не удалось отправить альбом пользователю {user_id}: {e}",
+                )
+                await send_photos(user_id, batch)
+    except RetryAfter as e:
+        logging.warning(
+            f"Превышен лимит запросов Telegram для пользователя {user_id} "
+            f"(повтор через {e.timeout} с), оставшиеся изображения "
+            f"не отправлены",
+        )
+
+
+async def prefetch_child_nodes(node_ids: List[int]) -> None:
+    """Заранее загружает узлы контента в кэш ApiClient.
+
+    Args:
+        node_ids: Идентификаторы узлов для загрузки.
+
+    Returns:
+        None
+
+    """
+    await asyncio.gather(
+        *(api.get_content_node(node_id) for node_id in node_ids),
+        return_exceptions=True,
+    )
+
+
+def schedule_child_prefetch(node_data: Dict[str, Any]) -> None:
+    """Запускает фоновую предзагрузку дочерних узлов.
+
+    Узлы, уже свежие в кэше, пропускаются; повторные запросы к узлам,
+    которые загружаются прямо сейчас, объединяет ApiClient.
+
+    Args:
+        node_data: Данные узла, дочерние узлы которого нужно загрузить.
+
+    Returns:
+        None
+
+    """
+    node_ids = [
+        button["next_node_id"]
+        for button in node_data.get("buttons", [])
+        if button.get("next_node_id")
+        and not api.is_node_fresh(button["next_node_id"])
+    ]
+    if not node_ids:
+        return
+    task = asyncio.create_task(prefetch_child_nodes(node_ids))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
 
 async def reset_to_root_menu(user_id: int) -> None:
     """Сбрасывает навигацию пользователя к главному меню.
 
-    Запрашивает данные корневого узла через API и отображает главное меню.
+    Запрашивает данные корневого узла через API, запускает предзагрузку
+    дочерних узлов и отображает главное меню.
     Если данные не получены, отправляет сообщение об ошибке.
 
     Args:
@@ -33,7 +188,11 @@ async def reset_to_root_menu(user_id: int) -> None:
     """
     root_node_data = await api.get_root_node()
     if root_node_data:
-        user_nav_stack[user_id] = [root_node_data["id"]]
+        users[user_id].reset_navigation(root_node_data["id"])
+        # Устаревшая копия корня означает, что API недоступен:
+        # предзагрузка в этом случае только породит заведомо неудачные запросы.
+        if api.is_node_fresh(ROOT_NODE_CACHE_KEY):
+            schedule_child_prefetch(root_node_data)
         await show_main_menu(user_id, root_node_data)
     else:
         await bot.send_message(user_id, "Не удалось загрузить главное меню.")
@@ -56,9 +215,6 @@ async def show_main_menu(
     Returns:
         None
 
-    Raises:
-        Exception: Если не удалось отправить изображение, логируется ошибка.
-
     """
     if root_node_data is None:
         if not api.token:
@@ -75,19 +231,12 @@ async def show_main_menu(
                 "Возможно, проблема с аутентификацией.",
             )
             return
-        user_nav_stack[user_id] = [root_node_data["id"]]
+        users[user_id].reset_navigation(root_node_data["id"])
 
     markup = make_keyboard(root_node_data["id"], root_node_data, is_root=True)
 
     if root_node_data.get('images'):
-        for img_url in root_node_data['images']:
-            try:
-                await bot.send_photo(user_id, img_url)
-            except Exception as e:
-                logging.error(
-                    f"Не удалось отправить фото {img_url} "
-                    f"пользователю {user_id}: {e}",
-                )
+        await send_node_images(user_id, root_node_data['images'])
 
     await bot.send_message(
         user_id,
@@ -120,9 +269,10 @@ async def handle_navigation_actions(
         return
 
     if action == "back":
-        if user_id in user_nav_stack and len(user_nav_stack[user_id]) > 1:
-            user_nav_stack[user_id].pop()
-            node_id = user_nav_stack[user_id][-1]
+        nav_stack = users[user_id].nav_stack
+        if len(nav_stack) > 1:
+            nav_stack.pop()
+            node_id = nav_stack[-1]
             await navigate_content_node(message, user_id, node_id, back=True)
         else:
             await reset_to_root_menu(user_id)
@@ -146,7 +296,7 @@ async def open_support_menu(
 ) -> None:
     """Открывает меню поддержки с соответствующей клавиатурой."""
     if not back:
-        user_nav_stack.setdefault(user_id, []).append("support_menu")
+        users[user_id].nav_stack.append("support_menu")
     support_keyboard = build_support_menu_keyboard()
     await message.answer("Выберите действие:", reply_markup=support_keyboard)
 
@@ -156,7 +306,7 @@ async def request_new_conversation(
     user_id: int,
 ) -> None:
     """Запрашивает название новой беседы у пользователя."""
-    creating_conversation[user_id] = True
+    users[user_id].awaiting = "conversation"
     await message.answer("Введите название новой беседы:")
 
 
@@ -167,8 +317,8 @@ async def show_user_conversations(
 ) -> None:
     """Показывает список активных бесед пользователя."""
     if not back:
-        user_nav_stack.setdefault(user_id, []).append("list_conversations")
-    tickets = await api.get_user_tickets()
+        users[user_id].nav_stack.append("list_conversations")
+    tickets = await api.get_user_tickets(user_id)
     if tickets:
         markup = build_user_tickets_keyboard(tickets)
         await message.answer("Ваши беседы:", reply_markup=markup)
@@ -186,20 +336,23 @@ async def show_ticket_messages(
     ticket_id = int(action.split(":")[1])
     messages = await api.get_ticket_messages(ticket_id)
     if not back:
-        user_nav_stack.setdefault(user_id, []).append(action)
+        users[user_id].nav_stack.append(action)
     if messages:
-        await message.answer(f"\U0001F4AC Сообщения в беседе #{ticket_id}:")
+        lines = [f"\U0001F4AC Сообщения в беседе #{ticket_id}:"]
         for m in messages:
             sender = "Вы" if m["sender_id"] == user_id else "Менеджер"
             dt = m["created_at"]
-            await message.answer(
+            lines.append(
                 f"\U0001F552 {dt}\n\U0001F464 {sender}:\n{m['text']}",
             )
+        for chunk in chunk_message_lines(lines):
+            await message.answer(chunk)
     else:
         await message.answer("Беседа пуста.")
 
-    user_ticket_id[user_id] = ticket_id
-    waiting_for_message.add(user_id)
+    state = users[user_id]
+    state.ticket_id = ticket_id
+    state.awaiting = "message"
     await message.answer(
         "\u270F\ufe0f Напишите новое сообщение:",
         reply_markup=build_ticket_chat_keyboard(),
@@ -224,28 +377,16 @@ async def navigate_content_node(
         return
 
     has_children_buttons = bool(node_data.get("buttons"))
-    is_root = user_nav_stack.get(user_id) == [node_id]
+    nav_stack = users[user_id].nav_stack
+    is_root = len(nav_stack) == 1 and nav_stack[0] == node_id
 
     if has_children_buttons:
-        if (
-            not back
-            and (
-                not user_nav_stack.get(user_id)
-                or user_nav_stack[user_id][-1] != node_id
-            )
-        ):
-            user_nav_stack.setdefault(user_id, []).append(node_id)
+        if not back and (not nav_stack or nav_stack[-1] != node_id):
+            nav_stack.append(node_id)
 
         markup = make_keyboard(node_id, node_data, is_root=is_root)
 
-        for img_url in node_data.get("images", []):
-            try:
-                await bot.send_photo(user_id, img_url)
-            except Exception as e:
-                logging.error(
-                    f"Не удалось отправить фото "
-                    f"{img_url} пользователю {user_id}: {e}",
-                )
+        await send_node_images(user_id, node_data.get("images", []))
 
         await bot.send_message(
             user_id,
@@ -1,11 +1,44 @@
-from typing import Any, Dict, Set
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Optional
 
 from api_client import ApiClient
 
-user_nav_stack: Dict[int, list[Any]] = {}
-waiting_for_message: Set[int] = set()
-user_ticket_id: Dict[int, int] = {}
-creating_conversation: Dict[int, bool] = {}
-awaiting_username: Dict[int, bool] = {}
-awaiting_password: Dict[int, str] = {}
+NAV_STACK_MAXLEN = 64
+
+
+@dataclass
+class UserState:
+    """Состояние диалога пользователя с ботом.
+
+    Attributes:
+        nav_stack: История навигации по меню; самые старые шаги
+            отбрасываются при превышении NAV_STACK_MAXLEN.
+        ticket_id: ID выбранной беседы.
+        awaiting: Ожидаемый ввод: "username", "password",
+            "conversation" или "message".
+        password_username: Имя пользователя, для которого ожидается пароль.
+
+    """
+
+    nav_stack: deque[Any] = field(
+        default_factory=partial(deque, maxlen=NAV_STACK_MAXLEN),
+    )
+    ticket_id: Optional[int] = None
+    awaiting: Optional[str] = None
+    password_username: Optional[str] = None
+
+    def reset_navigation(self, root_node_id: int) -> None:
+        """Сбрасывает историю навигации к корневому узлу.
+
+        Args:
+            root_node_id: ID корневого узла.
+
+        """
+        self.nav_stack.clear()
+        self.nav_stack.append(root_node_id)
+
+
+users: defaultdict[int, UserState] = defaultdict(UserState)
 api = ApiClient()
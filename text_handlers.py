@@ -2,21 +2,19 @@ from typing import Optional
 
 from aiogram import types
 from keyboard_utils import (
+    BACK_BUTTON_TEXT,
+    HOME_BUTTON_TEXT,
     build_ticket_chat_keyboard,
     build_user_tickets_keyboard,
+    normalize_input_text,
     normalize_text,
     normalized_button_actions,
 )
 from navigation_handler import handle_navigation_actions, reset_to_root_menu
-from state import (
-    api,
-    awaiting_password,
-    awaiting_username,
-    creating_conversation,
-    user_nav_stack,
-    user_ticket_id,
-    waiting_for_message,
-)
+from state import UserState, api, users
+
+_BACK_NORM = normalize_text(BACK_BUTTON_TEXT)
+_HOME_NORM = normalize_text(HOME_BUTTON_TEXT)
 
 
 async def text_message_handler(message: types.Message) -> None:
@@ -28,20 +26,20 @@ async def text_message_handler(message: types.Message) -> None:
     :param message: Объект входящего сообщения от пользователя.
     """
     user_id: int = message.from_user.id
-    user_text: str = normalize_text(message.text)
-
-    if user_id in awaiting_username:
-        await handle_username_input(message, user_id)
-    elif user_id in awaiting_password:
-        await handle_password_input(message, user_id)
-    elif user_text == normalize_text("⬅️ Назад"):
-        await handle_back_action(message, user_id)
-    elif user_text == normalize_text("🏠 В начало"):
-        await handle_home_action(message, user_id)
-    elif user_id in creating_conversation:
-        await handle_conversation_creation(message, user_id)
-    elif user_id in waiting_for_message:
-        await handle_send_message(message, user_id)
+    awaiting: Optional[str] = users[user_id].awaiting
+
+    login_handler = _LOGIN_HANDLERS.get(awaiting)
+    if login_handler is not None:
+        await login_handler(message, user_id)
+        return
+
+    user_text: str = normalize_input_text(message.text)
+    handler = (
+        _NAVIGATION_HANDLERS.get(user_text)
+        or _INPUT_HANDLERS.get(awaiting)
+    )
+    if handler is not None:
+        await handler(message, user_id)
     else:
         await handle_navigation_or_fallback(message, user_id, user_text)
 
@@ -54,8 +52,9 @@ async def handle_username_input(message: types.Message, user_id: int) -> None:
     :param message: Сообщение с введённым именем.
     :param user_id: Идентификатор пользователя Telegram.
     """
-    awaiting_username.pop(user_id)
-    awaiting_password[user_id] = message.text.strip()
+    state = users[user_id]
+    state.awaiting = "password"
+    state.password_username = message.text.strip()
     await message.answer("Введите ваш пароль:")
 
 
@@ -68,7 +67,10 @@ async def handle_password_input(message: types.Message, user_id: int) -> None:
     :param message: Сообщение с введённым паролем.
     :param user_id: Идентификатор пользователя Telegram.
     """
-    username: str = awaiting_password.pop(user_id)
+    state = users[user_id]
+    username: str = state.password_username
+    state.awaiting = None
+    state.password_username = None
     password: str = message.text.strip()
     login_response: Optional[dict] = await api.login(
         username,
@@ -84,6 +86,18 @@ async def handle_password_input(message: types.Message, user_id: int) -> None:
         )
 
 
+def reset_ticket_chat(state: UserState) -> None:
+    """Выходит из режима переписки в беседе.
+
+    Сбрасывает выбранную беседу и ожидание ввода сообщения.
+
+    :param state: Состояние пользователя.
+    """
+    state.ticket_id = None
+    if state.awaiting == "message":
+        state.awaiting = None
+
+
 async def handle_back_action(message: types.Message, user_id: int) -> None:
     """Обрабатывает нажатие кнопки «⬅️ Назад».
 
@@ -93,11 +107,11 @@ async def handle_back_action(message: types.Message, user_id: int) -> None:
     :param message: Сообщение от пользователя.
     :param user_id: Идентификатор пользователя Telegram.
     """
-    if user_id in user_nav_stack and len(user_nav_stack[user_id]) > 1:
-        user_nav_stack[user_id].pop()
-        previous_action: str = user_nav_stack[user_id][-1]
-        waiting_for_message.discard(user_id)
-        user_ticket_id.pop(user_id, None)
+    state = users[user_id]
+    reset_ticket_chat(state)
+    if len(state.nav_stack) > 1:
+        state.nav_stack.pop()
+        previous_action: str = state.nav_stack[-1]
         await handle_navigation_actions(
             message,
             user_id,
@@ -105,8 +119,6 @@ async def handle_back_action(message: types.Message, user_id: int) -> None:
             back=True,
         )
     else:
-        waiting_for_message.discard(user_id)
-        user_ticket_id.pop(user_id, None)
         await reset_to_root_menu(user_id)
 
 
@@ -121,8 +133,7 @@ async def handle_home_action(message: types.Message, user_id: int) -> None:
     :param message: Сообщение от пользователя.
     :param user_id: Идентификатор пользователя Telegram.
     """
-    waiting_for_message.discard(user_id)
-    user_ticket_id.pop(user_id, None)
+    reset_ticket_chat(users[user_id])
     await reset_to_root_menu(user_id)
 
 
@@ -139,17 +150,22 @@ async def handle_conversation_creation(
     :param user_id: Идентификатор пользователя Telegram.
     """
     title: str = message.text.strip()
-    ticket_response: Optional[dict] = await api.create_ticket({
-        "client_id": user_id,
-        "is_active": True,
-        "conversation_name": title,
-    })
+    ticket_response: Optional[dict] = await api.create_ticket(
+        {
+            "client_id": user_id,
+            "is_active": True,
+            "conversation_name": title,
+        },
+        user_id=user_id,
+    )
 
-    creating_conversation.pop(user_id, None)
+    users[user_id].awaiting = None
 
     if ticket_response and "ticket_id" in ticket_response:
-        tickets: Optional[list[dict]] = await api.get_user_tickets()
-        user_nav_stack.setdefault(user_id, []).append("list_conversations")
+        tickets: Optional[list[dict]] = api.get_cached_user_tickets(user_id)
+        if tickets is None:
+            tickets = await api.get_user_tickets(user_id)
+        users[user_id].nav_stack.append("list_conversations")
         await message.answer(
             f"✅ Беседа «{title}» создана. "
             "Выберите её из списка, чтобы продолжить.",
@@ -167,7 +183,7 @@ async def handle_send_message(message: types.Message, user_id: int) -> None:
     :param message: Текстовое сообщение от пользователя.
     :param user_id: Идентификатор пользователя Telegram.
     """
-    ticket_id: Optional[int] = user_ticket_id.get(user_id)
+    ticket_id: Optional[int] = users[user_id].ticket_id
     if ticket_id:
         send_status: Optional[dict] = await api.send_message_to_conversation(
             ticket_id=ticket_id,
@@ -205,3 +221,19 @@ async def handle_navigation_or_fallback(
         await message.answer("Неизвестная команда. Используйте кнопки.")
         return
     await handle_navigation_actions(message, user_id, action)
+
+
+# Ввод логина и пароля имеет приоритет над кнопками навигации,
+# а ввод названия беседы и сообщения — нет.
+_LOGIN_HANDLERS = {
+    "username": handle_username_input,
+    "password": handle_password_input,
+}
+_NAVIGATION_HANDLERS = {
+    _BACK_NORM: handle_back_action,
+    _HOME_NORM: handle_home_action,
+}
+_INPUT_HANDLERS = {
+    "conversation": handle_conversation_creation,
+    "message": handle_send_message,
+}